@@ -1,21 +1,103 @@
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
 import os
+import re
+import secrets
+import sys
 import time
-import uuid
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import httpx
+import orjson
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from pydantic import BaseModel
 
+try:  # optional: binary (msgpack) envelopes on POST /a2a
+    import ormsgpack
+    _HAVE_MSGPACK = True
+except ImportError:  # pragma: no cover
+    _HAVE_MSGPACK = False
+
+_ResponseT = TypeVar("_ResponseT", bound=Response)
+
+# ======================================================================================
+# Settings (resolved once at import; call refresh_env() after mutating os.environ)
+# ======================================================================================
+
+# Placeholders only: _load_env() below assigns the real values at import time.
+_PUBLIC_URL: Optional[str] = None
+_BACKEND_BASE: Optional[str] = None
+_ECHO_PREFIX: str = ""
+_RPC_ECHO_PREFIX: str = ""
+MAX_BODY: int = 0
+_PROTOCOL_VERSION: str = ""
+_A2A_AGENT_NAME: str = ""
+_A2A_AGENT_VERSION: str = ""
+
+HELLO_AGENT_ID: str = ""
+HELLO_AGENT_NAME: str = ""
+HELLO_AGENT_VERSION: str = ""
+HELLO_AGENT_DESC: str = ""
+HELLO_AGENT_TAGS: Tuple[str, ...] = ()
+
+
+def _load_env() -> None:
+    """Read every environment-driven setting used by the request handlers."""
+    global _PUBLIC_URL, _BACKEND_BASE, _ECHO_PREFIX, _RPC_ECHO_PREFIX, MAX_BODY
+    global _PROTOCOL_VERSION, _A2A_AGENT_NAME, _A2A_AGENT_VERSION
+    global HELLO_AGENT_ID, HELLO_AGENT_NAME, HELLO_AGENT_VERSION, HELLO_AGENT_DESC, HELLO_AGENT_TAGS
+
+    # Normalized here (no trailing slash, "" -> None) so handlers never re-strip them.
+    _PUBLIC_URL = (os.getenv("PUBLIC_URL") or "").rstrip("/") or None
+    _BACKEND_BASE = (os.getenv("A2A_BACKEND_BASE") or "").rstrip("/") or None
+    # /a2a and the OpenAI shim echo verbatim by default; /rpc keeps its friendlier prefix.
+    _ECHO_PREFIX = os.getenv("A2A_ECHO_PREFIX", "")
+    _RPC_ECHO_PREFIX = os.getenv("A2A_ECHO_PREFIX", "You said: ")
+    # Request bodies above this many bytes are refused with 413 before they are parsed.
+    MAX_BODY = int(os.getenv("MAX_BODY_BYTES", 262144))
+    _PROTOCOL_VERSION = os.getenv("PROTOCOL_VERSION", "0.3.0")
+    _A2A_AGENT_NAME = os.getenv("A2A_AGENT_NAME", "Universal A2A Agent")
+    _A2A_AGENT_VERSION = os.getenv("A2A_AGENT_VERSION", "1.2.0")
+
+    # Interned and immutable: these are reused by every discovery document.
+    HELLO_AGENT_ID = sys.intern(os.getenv("HELLO_AGENT_ID", "hello-world"))
+    HELLO_AGENT_NAME = sys.intern(os.getenv("HELLO_AGENT_NAME", "Hello World"))
+    HELLO_AGENT_VERSION = sys.intern(os.getenv("HELLO_AGENT_VERSION", "1.2.0"))
+    HELLO_AGENT_DESC = sys.intern(os.getenv("HELLO_AGENT_DESC", "Universal A2A Hello"))
+    HELLO_AGENT_TAGS = tuple(sys.intern(t) for t in os.getenv("HELLO_AGENT_TAGS", "demo,tutorial").split(",") if t)
+
+
+_load_env()
+
 # ======================================================================================
 # App
 # ======================================================================================
 
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (C encoder) instead of the stdlib json module."""
+
+    def render(self, content: Any) -> bytes:
+        return _render_json(content)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await _warm_up()
+    yield
+    await _close_http()
+
+
 app = FastAPI(
+    lifespan=_lifespan,
+    default_response_class=ORJSONResponse,
     title="Universal A2A Agent",
     version=os.getenv("A2A_VERSION", "1.2.0"),
     description="Universal A2A Agent - HTTP surface for agent pipelines (+ ICA4AA compatibility).",
@@ -29,50 +111,162 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Manifests and agent cards are ~0.5-1 KB of repetitive JSON; tiny replies stay uncompressed.
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # ======================================================================================
 # Helpers
 # ======================================================================================
 
+def _new_id(nbytes: int = 16) -> str:
+    """Opaque random hex id; skips building and formatting a uuid.UUID."""
+    return os.urandom(nbytes).hex()
+
+
 def _request_id(req: Request) -> str:
-    return req.headers.get("x-request-id") or str(uuid.uuid4())
+    return req.headers.get("x-request-id") or _new_id()
 
 
-def _with_common_headers(rid: str) -> Dict[str, str]:
-    return {"x-request-id": rid, "cache-control": "no-store"}
+# Pre-encoded (name, value) pairs appended straight onto Response.raw_headers, so the
+# static part isn't rebuilt as a dict and re-encoded by Starlette on every response.
+_COMMON_HEADER_ITEMS = ((b"cache-control", b"no-store"),)
 
 
-def _public_base_url(request: Request) -> str:
-    return (os.getenv("PUBLIC_URL") or str(request.base_url)).rstrip("/")
+def _with_common_headers(response: _ResponseT, rid: Optional[str]) -> _ResponseT:
+    if rid:
+        response.raw_headers.append((b"x-request-id", rid.encode("latin-1")))
+    response.raw_headers.extend(_COMMON_HEADER_ITEMS)
+    return response
 
 
-def _backend_base_url(request: Request) -> str:
-    return (
-        os.getenv("A2A_BACKEND_BASE")
-        or os.getenv("PUBLIC_URL")
-        or str(request.base_url)
-    ).rstrip("/")
+def _json_response(content: Any, rid: str, status_code: int = 200) -> ORJSONResponse:
+    return _with_common_headers(ORJSONResponse(content, status_code=status_code), rid)
+
+
+def _raw_json_response(body: bytes, rid: str, status_code: int = 200) -> Response:
+    """Like _json_response, for bodies that were already serialized to JSON bytes."""
+    return _with_common_headers(Response(body, status_code=status_code, media_type="application/json"), rid)
+
+
+# Discovery documents only change on redeploy, so let clients and proxies cache them.
+_DISCOVERY_HEADER_ITEMS = ((b"cache-control", b"public, max-age=300, stale-while-revalidate=3600"),)
+# GZipMiddleware adds Vary to full bodies; a bodiless 304 must carry it itself.
+_NOT_MODIFIED_HEADER_ITEMS = ((b"vary", b"Accept-Encoding"),)
+
+
+def _render_json(payload: Any) -> bytes:
+    """Serialize a payload exactly like ORJSONResponse would."""
+    try:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson refuses integers beyond 64 bits (e.g. a client's JSON-RPC id); the
+        # stdlib encoder writes them exactly, in Starlette's JSONResponse format.
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# 19+ digit runs may be integers outside orjson's 64-bit range, which it decodes as floats.
+_WIDE_NUMBER = re.compile(rb"\d{19}")
+
+
+def _loads(raw: bytes) -> Any:
+    """Decode a JSON body with orjson, or with the stdlib when it could lose integer precision."""
+    if _WIDE_NUMBER.search(raw) is None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _body_too_large(req: Request) -> bool:
+    """Cheap Content-Length check, so oversized bodies are refused before being read."""
+    cl = req.headers.get("content-length")
+    return cl is not None and cl.isdigit() and int(cl) > MAX_BODY
+
+
+def _payload_too_large(rid: str) -> ORJSONResponse:
+    return _json_response({"error": {"message": "payload too large"}}, rid, status_code=413)
+
+
+async def _read_body(req: Request) -> Optional[bytes]:
+    """
+    Buffer the request body, or return None as soon as it exceeds MAX_BODY.
+
+    Chunked uploads carry no Content-Length, so the size is also counted while the
+    body streams in; an oversized payload is never fully buffered or parsed.
+    """
+    if _body_too_large(req):
+        return None
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in req.stream():
+        size += len(chunk)
+        if size > MAX_BODY:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@lru_cache(maxsize=32)
+def _etag(body: bytes) -> str:
+    # Cached builders hand back the same bytes object, whose hash is memoized too.
+    # Weak, because GZipMiddleware may re-encode the same document on the wire.
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison and may carry a list of tags or "*"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:]  # drop our "W/" prefix
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _discovery_response(req: Request, body: bytes) -> Response:
+    """Serve a cached discovery document with its ETag, or a 304 when the client has it."""
+    etag = _etag(body)
+    if _etag_matches(req.headers.get("if-none-match"), etag):
+        response = Response(status_code=304)
+        response.raw_headers.extend(_NOT_MODIFIED_HEADER_ITEMS)
+    else:
+        response = Response(body, media_type="application/json")
+    # These replies are shared-cacheable, so a minted id would be replayed to other
+    # clients; only echo one the caller supplied (as the health probes do).
+    rid = req.headers.get("x-request-id")
+    if rid:
+        response.raw_headers.append((b"x-request-id", rid.encode("latin-1")))
+    response.raw_headers.extend(_DISCOVERY_HEADER_ITEMS)
+    response.raw_headers.append((b"etag", etag.encode("latin-1")))
+    return response
+
+
+def _public_base_url(request: Request) -> str:
+    # request.base_url is itself cached on the Request, so this is cheap when PUBLIC_URL is unset.
+    return _PUBLIC_URL or str(request.base_url).rstrip("/")
 
 
 def _extract_user_text_from_a2a(params: Dict[str, Any]) -> str:
     """
     Pull the first text part from A2A-shaped params:
       params = {"message": {"parts": [{"text": "..."}, {"type":"text","text":"..."}]}}
+
+    Callers always pass a dict (``body.get("params") or {}``), so only the nested
+    message/parts levels are defaulted.
     """
-    msg = (params or {}).get("message") or {}
-    for p in (msg.get("parts") or []):
-        if not isinstance(p, dict):
-            continue
-        if isinstance(p.get("text"), str) and p.get("text"):
-            return p["text"]
+    msg = params.get("message") or {}
+    for p in (msg.get("parts") or ()):
+        # Decoded JSON only yields plain dict/str, so exact type checks are enough.
+        t = p.get("text") if type(p) is dict else None
+        if t and type(t) is str:
+            return t
     return ""
 
 
 def _extract_context_id(params: Dict[str, Any]) -> str:
     """Best-effort context id extraction, or create one if missing."""
     return (
-        (params or {}).get("contextId")
-        or ((params or {}).get("message") or {}).get("contextId")
-        or f"ctx-{uuid.uuid4()}"
+        params.get("contextId")
+        or (params.get("message") or {}).get("contextId")
+        or f"ctx-{_new_id()}"
     )
 
 
@@ -89,15 +283,25 @@ def _make_a2a_text_message(text: str, context_id: str) -> Dict[str, Any]:
     """
     return {
         "kind": "message",
-        "messageId": f"msg-{uuid.uuid4()}",  # use messageId (not id)
+        "messageId": f"msg-{_new_id(12)}",  # use messageId (not id)
         "contextId": context_id,
         "role": "agent",
         "parts": [{"text": text}],
     }
 
 
-def _ok() -> Dict[str, str]:
-    return {"status": "ok"}
+async def _reply_for(user_text: str, context_id: str, echo_prefix: str) -> Dict[str, Any]:
+    """One message/send turn: the agent's reply message, shared by /a2a, /rpc and the actions."""
+    return _make_a2a_text_message(echo_prefix + user_text, context_id)
+
+
+_HEALTH_BODY = b'{"status":"ok"}'
+
+
+def _health_response(req: Request) -> Response:
+    # Probes hit these constantly: echo a caller-supplied request id, but never mint one.
+    response = Response(_HEALTH_BODY, media_type="application/json")
+    return _with_common_headers(response, req.headers.get("x-request-id"))
 
 
 # ======================================================================================
@@ -110,37 +314,31 @@ async def root() -> RedirectResponse:
 
 
 @app.get("/healthz")
-async def healthz(req: Request) -> JSONResponse:
-    rid = _request_id(req)
-    return JSONResponse(_ok(), headers=_with_common_headers(rid))
+async def healthz(req: Request) -> Response:
+    return _health_response(req)
 
 
 @app.get("/health", include_in_schema=False)
-async def health_alias(req: Request) -> JSONResponse:
-    rid = _request_id(req)
-    return JSONResponse(_ok(), headers=_with_common_headers(rid))
+async def health_alias(req: Request) -> Response:
+    return _health_response(req)
 
 
 @app.get("/readyz")
-async def readyz(req: Request) -> JSONResponse:
-    rid = _request_id(req)
-    return JSONResponse(_ok(), headers=_with_common_headers(rid))
+async def readyz(req: Request) -> Response:
+    return _health_response(req)
 
 
 # ======================================================================================
 # A2A Inspector-friendly agent card (rich schema)
 # ======================================================================================
 
-@app.get("/.well-known/agent-card.json")
-@app.get("/.well-known/agent.json")
-async def well_known_agent_card(req: Request) -> JSONResponse:
-    rid = _request_id(req)
-    base = _public_base_url(req)
-    card = {
-        "protocolVersion": os.getenv("PROTOCOL_VERSION", "0.3.0"),
+@lru_cache(maxsize=8)
+def _build_agent_card(base: str) -> bytes:
+    return _render_json({
+        "protocolVersion": _PROTOCOL_VERSION,
         "preferredTransport": "JSONRPC",
-        "name": os.getenv("A2A_AGENT_NAME", "Universal A2A Agent"),
-        "version": os.getenv("A2A_AGENT_VERSION", "1.2.0"),
+        "name": _A2A_AGENT_NAME,
+        "version": _A2A_AGENT_VERSION,
         "description": "Universal A2A HTTP entry point.",
         "url": f"{base}/rpc",
         "capabilities": {"streaming": False, "pushNotifications": False},
@@ -160,85 +358,168 @@ async def well_known_agent_card(req: Request) -> JSONResponse:
             "openai": f"{base}/openai/v1/chat/completions",
             "health": f"{base}/healthz",
         },
-    }
-    return JSONResponse(card, headers=_with_common_headers(rid))
+    })
+
+
+@app.get("/.well-known/agent-card.json")
+@app.get("/.well-known/agent.json")
+async def well_known_agent_card(req: Request) -> Response:
+    return _discovery_response(req, _build_agent_card(_public_base_url(req)))
 
 
 # ======================================================================================
 # A2A: message/send (canonical, non-JSON-RPC)
 # ======================================================================================
 
-@app.post("/a2a")
-async def a2a_endpoint(req: Request) -> JSONResponse:
+_MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _accept_q(params: str) -> float:
+    """Quality value from a media range's parameters (";q=0.5"); 1 when absent or malformed."""
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def _wants_msgpack(req: Request) -> bool:
+    """
+    True when Accept lists a msgpack type with a non-zero q ("q=0" means never) that
+    is at least the q given to application/json; anything else gets JSON.
+    """
+    if not _HAVE_MSGPACK:
+        return False
+    msgpack_q = json_q = 0.0
+    for media_range in req.headers.get("accept", "").split(","):
+        media_type, _, params = media_range.partition(";")
+        media_type = media_type.strip().lower()
+        if media_type in _MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, _accept_q(params))
+        elif media_type == "application/json":
+            json_q = max(json_q, _accept_q(params))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def _a2a_response(req: Request, content: Any, rid: str, status_code: int = 200) -> Response:
+    """Reply in msgpack when the client asks for it, JSON otherwise."""
+    if _wants_msgpack(req):
+        response = Response(ormsgpack.packb(content), status_code=status_code, media_type=_MSGPACK_TYPES[0])
+        return _with_common_headers(response, rid)
+    return _json_response(content, rid, status_code=status_code)
+
+
+async def a2a_endpoint(req: Request) -> Response:
     rid = _request_id(req)
-    body = await req.json()
+    raw = await _read_body(req)
+    if raw is None:
+        return _payload_too_large(rid)
+    # Media types are case-insensitive; parse them the same way _wants_msgpack does Accept.
+    content_type = req.headers.get("content-type", "").partition(";")[0].strip().lower()
+    if content_type in _MSGPACK_TYPES:
+        if not _HAVE_MSGPACK:
+            return _json_response(
+                {"error": {"code": -32700, "message": "msgpack bodies need the optional 'ormsgpack' package."}},
+                rid,
+                status_code=415,
+            )
+        body = ormsgpack.unpackb(raw)
+    else:
+        body = _loads(raw)
     method = body.get("method")
     params = body.get("params") or {}
 
     if method != "message/send":
-        return JSONResponse(
+        return _a2a_response(
+            req,
             {"error": {"code": -32601, "message": f"Unsupported method: {method}"}},
+            rid,
             status_code=400,
-            headers=_with_common_headers(rid),
         )
 
     user_text = _extract_user_text_from_a2a(params).strip()
     if not user_text:
-        return JSONResponse(
+        return _a2a_response(
+            req,
             {"error": {"code": -32602, "message": "No text found in message parts."}},
+            rid,
             status_code=400,
-            headers=_with_common_headers(rid),
         )
 
-    context_id = _extract_context_id(params)
-    reply = os.getenv("A2A_ECHO_PREFIX", "") + user_text
-
     # FIXED: The result should be the message object directly.
-    result = _make_a2a_text_message(reply, context_id)
-    return JSONResponse({"result": result}, headers=_with_common_headers(rid))
+    result = await _reply_for(user_text, _extract_context_id(params), _ECHO_PREFIX)
+    return _a2a_response(req, {"result": result}, rid)
+
+
+# The handler parses its own body, so mount it as a plain Starlette route and skip
+# FastAPI's per-request dependency/parameter solving (it also drops out of /docs).
+app.add_route("/a2a", a2a_endpoint, methods=["POST"])
 
 
 # ======================================================================================
 # JSON-RPC 2.0 mirror (what the Inspector calls)
 # ======================================================================================
 
-@app.post("/rpc")
-async def jsonrpc(req: Request) -> JSONResponse:
-    rid = _request_id(req)
-    body = await req.json()
+def _rpc_error(code: int, message: str, rpc_id: Any, rid: str) -> ORJSONResponse:
+    return _json_response(
+        {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": rpc_id},
+        rid,
+        status_code=400,
+    )
 
-    if body.get("jsonrpc") != "2.0":
-        return JSONResponse(
-            {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": body.get("id")},
-            status_code=400,
-            headers=_with_common_headers(rid),
-        )
 
-    method = body.get("method")
-    params = (body.get("params") or {})
-    if method != "message/send":
-        return JSONResponse(
-            {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Unsupported method: {method}"}, "id": body.get("id")},
-            status_code=400,
-            headers=_with_common_headers(rid),
-        )
+class _RpcError(Exception):
+    """Raised by a JSON-RPC method handler to answer with an error object."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
 
+
+async def _rpc_message_send(params: Dict[str, Any]) -> Dict[str, Any]:
     user_text = _extract_user_text_from_a2a(params).strip()
     if not user_text:
-        return JSONResponse(
-            {"jsonrpc": "2.0", "error": {"code": -32602, "message": "No text found in message parts."}, "id": body.get("id")},
-            status_code=400,
-            headers=_with_common_headers(rid),
-        )
+        raise _RpcError(-32602, "No text found in message parts.")
+    # FIXED: The result should be the message object directly, not a container.
+    return await _reply_for(user_text, _extract_context_id(params), _RPC_ECHO_PREFIX)
 
-    context_id = _extract_context_id(params)
-    reply = os.getenv("A2A_ECHO_PREFIX", "You said: ") + user_text
 
-    # FIXED: The result should be the message object directly, not a container.
-    result = _make_a2a_text_message(reply, context_id)
-    return JSONResponse(
-        {"jsonrpc": "2.0", "result": result, "id": body.get("id")},
-        headers=_with_common_headers(rid)
+# method name -> handler(params) -> result; new methods are one entry, unknown ones get -32601.
+_RPC_METHODS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+    "message/send": _rpc_message_send,
+}
+
+
+@app.post("/rpc")
+async def jsonrpc(req: Request) -> Response:
+    rid = _request_id(req)
+    raw = await _read_body(req)
+    if raw is None:
+        return _payload_too_large(rid)
+    body = _loads(raw)
+    # Pull each envelope field out once; only params.message is walked further.
+    rpc_id = body.get("id")
+
+    if body.get("jsonrpc") != "2.0":
+        return _rpc_error(-32600, "Invalid Request", rpc_id, rid)
+
+    method = body.get("method")
+    handler = _RPC_METHODS.get(method) if type(method) is str else None
+    if handler is None:
+        return _rpc_error(-32601, f"Unsupported method: {method}", rpc_id, rid)
+
+    try:
+        result = await handler(body.get("params") or {})
+    except _RpcError as exc:
+        return _rpc_error(exc.code, exc.message, rpc_id, rid)
+    # Constant envelope spliced around the encoded result; no wrapper dict per call.
+    return _raw_json_response(
+        b'{"jsonrpc":"2.0","result":' + _render_json(result) + b',"id":' + _render_json(rpc_id) + b"}",
+        rid,
     )
 
 
@@ -246,48 +527,65 @@ async def jsonrpc(req: Request) -> JSONResponse:
 # OpenAI-compatible passthrough (minimal)
 # ======================================================================================
 
+# Random per-process prefix + counter: unique completion ids without a getrandom() per call.
+_COMPLETION_ID_PREFIX = f"cmpl-{secrets.token_hex(4)}"
+_completion_ids = itertools.count()
+
+# Fixed response frame; only the %-slots are encoded per request (strings via orjson, so
+# they're escaped). Key order matches what the equivalent dict would serialize to.
+_OPENAI_TMPL = (
+    b'{"id":"%b-%x","object":"chat.completion","created":%d,"model":%b,'
+    b'"choices":[{"index":0,"finish_reason":"stop","message":{"role":"assistant","content":%b}}],'
+    b'"usage":{"prompt_tokens":%d,"completion_tokens":%d,"total_tokens":0}}'
+)
+_COMPLETION_ID_PREFIX_BYTES = _COMPLETION_ID_PREFIX.encode("ascii")
+
+
 @app.post("/openai/v1/chat/completions")
-async def openai_chat_completions(req: Request) -> JSONResponse:
+async def openai_chat_completions(req: Request) -> Response:
     rid = _request_id(req)
-    body = await req.json()
+    raw = await _read_body(req)
+    if raw is None:
+        return _payload_too_large(rid)
+    body = _loads(raw)
     messages = body.get("messages") or []
     user_text = ""
-    for m in reversed(messages):
-        if (m or {}).get("role") == "user":
-            user_text = (m.get("content") or "").strip()
-            if user_text:
-                break
+    # Fast path: the newest turn is almost always the user's; only walk back otherwise.
+    last = messages[-1] if messages else None
+    if last and last.get("role") == "user":
+        user_text = (last.get("content") or "").strip()
     if not user_text:
-        return JSONResponse(
+        for m in reversed(messages):
+            if (m or {}).get("role") == "user":
+                user_text = (m.get("content") or "").strip()
+                if user_text:
+                    break
+    if not user_text:
+        return _json_response(
             {"error": {"message": "No user message found."}},
+            rid,
             status_code=400,
-            headers=_with_common_headers(rid),
         )
 
-    reply = os.getenv("A2A_ECHO_PREFIX", "") + user_text
-    now = int(time.time())
-    resp = {
-        "id": f"cmpl-{uuid.uuid4()}",
-        "object": "chat.completion",
-        "created": now,
-        "model": body.get("model", "dummy-a2a"),
-        "choices": [
-            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}
-        ],
-        "usage": {"prompt_tokens": len(user_text.split()), "completion_tokens": len(reply.split()), "total_tokens": 0},
-    }
-    return JSONResponse(resp, headers=_with_common_headers(rid))
+    reply = _ECHO_PREFIX + user_text
+    # ~4 chars per token: a cheap estimate that avoids splitting both strings into lists.
+    payload = _OPENAI_TMPL % (
+        _COMPLETION_ID_PREFIX_BYTES,
+        next(_completion_ids),
+        int(time.time()),
+        _render_json(body.get("model", "dummy-a2a")),
+        orjson.dumps(reply),
+        max(1, len(user_text) >> 2),
+        max(1, len(reply) >> 2),
+    )
+    return _raw_json_response(payload, rid)
 
 
 # ======================================================================================
 # -----------------------  ICA4AA compatibility extensions  ---------------------------
 # ======================================================================================
 
-HELLO_AGENT_ID = os.getenv("HELLO_AGENT_ID", "hello-world")
-HELLO_AGENT_NAME = os.getenv("HELLO_AGENT_NAME", "Hello World")
-HELLO_AGENT_VERSION = os.getenv("HELLO_AGENT_VERSION", "1.2.0")
-HELLO_AGENT_DESC = os.getenv("HELLO_AGENT_DESC", "Universal A2A Hello")
-HELLO_AGENT_TAGS = [t for t in (os.getenv("HELLO_AGENT_TAGS", "demo,tutorial").split(",")) if t]
+# HELLO_AGENT_* identity settings are resolved in _load_env() at the top of the module.
 
 SAY_HELLO_INPUT = {
     "type": "object",
@@ -302,18 +600,49 @@ SAY_HELLO_OUTPUT = {
     "additionalProperties": False,
 }
 
+# Serialized once; orjson splices Fragments into the discovery documents verbatim
+# instead of walking the schema dicts again on every cache miss.
+_SAY_HELLO_INPUT_JSON = orjson.Fragment(orjson.dumps(SAY_HELLO_INPUT))
+_SAY_HELLO_OUTPUT_JSON = orjson.Fragment(orjson.dumps(SAY_HELLO_OUTPUT))
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    """Shared keep-alive pool for backend calls, created on first use."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+            timeout=20.0,
+        )
+    return _http_client
+
+
+async def _close_http() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
-def _invoke_via_local_a2a(base_url: str, prompt_text: str, timeout: float = 20.0) -> str:
+async def _invoke_via_backend_a2a(base_url: str, prompt_text: str, timeout: float = 20.0) -> str:
     """
-    Reuse our /a2a pipeline; tolerate all server shapes we might return.
+    Call a remote Universal A2A /a2a endpoint; tolerate all server shapes it might return.
     """
     payload = {
         "method": "message/send",
         "params": {"message": {"role": "user", "messageId": "ica4aa", "parts": [{"text": prompt_text}]}}
     }
-    r = httpx.post(f"{base_url}/a2a", json=payload, timeout=timeout)
+    r = await _http().post(
+        f"{base_url}/a2a",
+        content=orjson.dumps(payload),
+        headers={"content-type": "application/json"},
+        timeout=timeout,
+    )
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
 
     # unwrap {"result": ...} if present
     data = data.get("result", data)
@@ -329,11 +658,31 @@ def _invoke_via_local_a2a(base_url: str, prompt_text: str, timeout: float = 20.0
     return ""
 
 
-@app.get("/a2a/manifest", tags=["ica4aa"], summary="Agent Manifest")
-async def get_manifest(request: Request) -> JSONResponse:
-    rid = _request_id(request)
-    base = _public_base_url(request)
-    manifest = {
+def _agent_endpoints(base: str) -> Dict[str, str]:
+    return {
+        "invoke": f"{base}/api/v1/agents/{HELLO_AGENT_ID}/invoke",
+        "health": f"{base}/healthz",
+    }
+
+
+def _agent_entry(base: str) -> Dict[str, Any]:
+    """The agent record shared by the directory listings."""
+    return {
+        "id": HELLO_AGENT_ID,
+        "name": HELLO_AGENT_NAME,
+        "version": HELLO_AGENT_VERSION,
+        "description": HELLO_AGENT_DESC,
+        "tags": HELLO_AGENT_TAGS,
+        "endpoints": _agent_endpoints(base),
+        "auth": {"type": "none"},
+        "input_schema": _SAY_HELLO_INPUT_JSON,
+        "output_schema": _SAY_HELLO_OUTPUT_JSON,
+    }
+
+
+@lru_cache(maxsize=8)
+def _build_manifest(base: str) -> bytes:
+    return _render_json({
         "apiVersion": "a2a/v1",
         "kind": "Agent",
         "metadata": {
@@ -344,13 +693,10 @@ async def get_manifest(request: Request) -> JSONResponse:
             "tags": HELLO_AGENT_TAGS,
         },
         "spec": {
-            "endpoints": {
-                "invoke": f"{base}/api/v1/agents/{HELLO_AGENT_ID}/invoke",
-                "health": f"{base}/healthz",
-            },
+            "endpoints": _agent_endpoints(base),
             "auth": {"type": "none"},
-            "inputSchema": SAY_HELLO_INPUT,
-            "outputSchema": SAY_HELLO_OUTPUT,
+            "inputSchema": _SAY_HELLO_INPUT_JSON,
+            "outputSchema": _SAY_HELLO_OUTPUT_JSON,
             "endpointBaseUrl": base,
             "openapi": "/openapi.json",
             "actions": [
@@ -359,67 +705,49 @@ async def get_manifest(request: Request) -> JSONResponse:
                     "description": "Return a friendly greeting via the Universal A2A backend.",
                     "method": "POST",
                     "path": "/a2a/actions/say_hello",
-                    "input": SAY_HELLO_INPUT,
-                    "output": SAY_HELLO_OUTPUT,
+                    "input": _SAY_HELLO_INPUT_JSON,
+                    "output": _SAY_HELLO_OUTPUT_JSON,
                 }
             ],
         },
-    }
-    return JSONResponse(manifest, headers=_with_common_headers(rid))
+    })
 
 
-@app.get("/a2a/agents", tags=["ica4aa"], summary="Agents Directory")
-async def list_agents(request: Request) -> JSONResponse:
-    rid = _request_id(request)
-    base = _public_base_url(request)
-    listing = {
+@lru_cache(maxsize=8)
+def _build_directory(base: str) -> bytes:
+    return _render_json({
         "agents": [
             {
-                "id": HELLO_AGENT_ID,
-                "name": HELLO_AGENT_NAME,
-                "version": HELLO_AGENT_VERSION,
-                "description": HELLO_AGENT_DESC,
-                "tags": HELLO_AGENT_TAGS,
-                "endpoints": {
-                    "invoke": f"{base}/api/v1/agents/{HELLO_AGENT_ID}/invoke",
-                    "health": f"{base}/healthz",
-                },
-                "auth": {"type": "none"},
-                "input_schema": SAY_HELLO_INPUT,
-                "output_schema": SAY_HELLO_OUTPUT,
+                **_agent_entry(base),
                 "manifestUrl": f"{base}/a2a/manifest",
                 "endpointBaseUrl": base,
             }
         ]
-    }
-    return JSONResponse(listing, headers=_with_common_headers(rid))
+    })
+
+
+@lru_cache(maxsize=8)
+def _build_well_known(base: str) -> bytes:
+    return _render_json({
+        "version": "1.0",
+        "agents": [_agent_entry(base)],
+    })
+
+
+@app.get("/a2a/manifest", tags=["ica4aa"], summary="Agent Manifest")
+async def get_manifest(request: Request) -> Response:
+    return _discovery_response(request, _build_manifest(_public_base_url(request)))
+
+
+@app.get("/a2a/agents", tags=["ica4aa"], summary="Agents Directory")
+async def list_agents(request: Request) -> Response:
+    return _discovery_response(request, _build_directory(_public_base_url(request)))
 
 
 @app.get("/.well-known/ica4aa/agents", tags=["ica4aa"], summary="Agents Directory (well-known)")
 @app.get("/api/v1/agents", tags=["ica4aa"], summary="Agents Directory (compat)")
-async def well_known_agents(request: Request) -> JSONResponse:
-    rid = _request_id(request)
-    base = _public_base_url(request)
-    payload = {
-        "version": "1.0",
-        "agents": [
-            {
-                "id": HELLO_AGENT_ID,
-                "name": HELLO_AGENT_NAME,
-                "version": HELLO_AGENT_VERSION,
-                "description": HELLO_AGENT_DESC,
-                "tags": HELLO_AGENT_TAGS,
-                "endpoints": {
-                    "invoke": f"{base}/api/v1/agents/{HELLO_AGENT_ID}/invoke",
-                    "health": f"{base}/healthz",
-                },
-                "auth": {"type": "none"},
-                "input_schema": SAY_HELLO_INPUT,
-                "output_schema": SAY_HELLO_OUTPUT,
-            }
-        ],
-    }
-    return JSONResponse(payload, headers=_with_common_headers(rid))
+async def well_known_agents(request: Request) -> Response:
+    return _discovery_response(request, _build_well_known(_public_base_url(request)))
 
 
 class SayHelloIn(BaseModel):
@@ -430,28 +758,59 @@ class SayHelloOut(BaseModel):
     message: str
 
 
-@app.post("/a2a/actions/say_hello", response_model=SayHelloOut, tags=["ica4aa"], summary="Say Hello")
-async def say_hello(payload: SayHelloIn, request: Request) -> JSONResponse:
+async def _do_greet(payload: SayHelloIn, request: Request) -> ORJSONResponse:
+    """Shared body of the say_hello action and the ICA4AA invoke route."""
     rid = _request_id(request)
     name = (payload.name or "World").strip() or "World"
     prompt = f"Say hello to {name}."
     try:
-        reply = _invoke_via_local_a2a(_backend_base_url(request), prompt)
+        if _BACKEND_BASE:
+            reply = await _invoke_via_backend_a2a(_BACKEND_BASE, prompt)
+        else:
+            # Same message/send pipeline as POST /a2a, minus an HTTP round trip to ourselves.
+            message = await _reply_for(prompt, _extract_context_id({}), _ECHO_PREFIX)
+            reply = message["parts"][0]["text"]
     except Exception:
         reply = f"Hello, {name}!"
-    return JSONResponse(SayHelloOut(message=reply).model_dump(), headers=_with_common_headers(rid))
+    return _json_response({"message": reply}, rid)
 
 
-@app.post("/api/v1/agents/{agent_id}/invoke", response_model=SayHelloOut, tags=["ica4aa"], summary="Invoke Agent")
-async def invoke_agent(agent_id: str, payload: SayHelloIn, request: Request) -> JSONResponse:
-    rid = _request_id(request)
-    name = (payload.name or "World").strip() or "World"
-    prompt = f"Say hello to {name}."
-    try:
-        reply = _invoke_via_local_a2a(_backend_base_url(request), prompt)
-    except Exception:
-        reply = f"Hello, {name}!"
-    return JSONResponse(SayHelloOut(message=reply).model_dump(), headers=_with_common_headers(rid))
+# SayHelloOut only documents the reply; the handlers emit {"message": ...} directly
+# so no model is built or validated on the hot path.
+@app.post("/a2a/actions/say_hello", responses={200: {"model": SayHelloOut}}, tags=["ica4aa"], summary="Say Hello")
+async def say_hello(payload: SayHelloIn, request: Request) -> ORJSONResponse:
+    return await _do_greet(payload, request)
+
+
+@app.post("/api/v1/agents/{agent_id}/invoke", responses={200: {"model": SayHelloOut}}, tags=["ica4aa"], summary="Invoke Agent")
+async def invoke_agent(agent_id: str, payload: SayHelloIn, request: Request) -> ORJSONResponse:
+    return await _do_greet(payload, request)
+
+
+_DISCOVERY_BUILDERS = (_build_agent_card, _build_manifest, _build_directory, _build_well_known)
+
+
+def refresh_env() -> None:
+    """Re-read the environment and drop everything derived from it (handy in tests)."""
+    _load_env()
+    for builder in _DISCOVERY_BUILDERS:
+        builder.cache_clear()
+
+
+async def _warm_up() -> None:
+    """Render discovery documents for PUBLIC_URL and open a pooled backend connection at startup."""
+    if _PUBLIC_URL:
+        for builder in _DISCOVERY_BUILDERS:
+            builder(_PUBLIC_URL)
+    # Only a remote backend can be reached here; this process isn't serving yet.
+    if _BACKEND_BASE:
+        try:
+            await _http().get(f"{_BACKEND_BASE}/healthz", timeout=2.0)
+        except Exception:
+            # Best effort only: a down or malformed backend (e.g. an unexpanded
+            # ${PORT} template -> httpx.InvalidURL) must never stop the app booting.
+            pass
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -459,5 +818,8 @@ if __name__ == "__main__":
         "__main__:app", # Changed for direct execution
         host="0.0.0.0",
         port=int(os.getenv("PORT", "8080")),
-        reload=True,
+        # loop/http stay "auto": uvicorn picks uvloop + httptools whenever they're installed.
+        access_log=False,
+        reload=os.getenv("DEV") == "1",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
     )
\ No newline at end of file